@@ -1,44 +1,78 @@
+import contextlib
+import copy
+import functools
 import os
-import platformdirs
-import yaml
-from abc import abstractmethod
+import sys
+import weakref
 from email.mime.base import MIMEBase
 from os import environ, path
-from typing import Union, MutableMapping, List, Dict, Mapping
-import combine_settings
-from filelock import FileLock
-
-_OUTLOOK_SERVER = {
+from types import MappingProxyType
+from typing import (Any, Union, Iterator, MutableMapping, List, Dict, Mapping,
+                    Optional, Set, Tuple, TYPE_CHECKING)
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; see _creds_lock().
+    fcntl = None
+
+# yaml, platformdirs, combine_settings and filelock are imported where they're
+# used, so importing this module (e.g. just for MailSenderException) stays cheap.
+if TYPE_CHECKING:
+    from filelock import FileLock
+
+# Parsed credentials files, keyed by path. Each entry holds the _file_stamp()
+# of the file when it was parsed, so a changed file is re-read.
+_CREDS_CACHE: Dict[str, Tuple[Tuple[int, int, int, int], Any]] = {}
+
+# Credentials directories already created by this process, and (where fcntl
+# isn't available) the lock for each credentials file, so they're set up once
+# rather than per sender.
+_DIR_ENSURED: Set[str] = set()
+_LOCK_CACHE: Dict[str, 'FileLock'] = {}
+
+# MailSender classes for module:class protocols, so each is resolved once.
+_PROTOCOL_CLASS_CACHE: Dict[str, type] = {}
+
+# Serialized messages, with the fingerprint of the message when serialized.
+# (See MailSender._serialize().)
+_SERIALIZED_MESSAGES = weakref.WeakKeyDictionary()
+
+# The smtp_sender module, once imported. (See _get_smtp().)
+_smtp_sender_mod = None
+
+# Read-only, including the entries, since it's shared by every configuration
+# load and the outlook entry is shared by several domains.
+_OUTLOOK_SERVER = MappingProxyType({
     'server': 'smtp-mail.outlook.com',
     'port': 587,
-}
-_BUILTIN_DOMAINS = {
-    'yahoo.com': {
+})
+_BUILTIN_DOMAINS = MappingProxyType({
+    'yahoo.com': MappingProxyType({
         'protocol': 'smtp',
         'server': 'smtp.mail.yahoo.com',
         'port': 587,
-    },
-    'aol.com': {
+    }),
+    'aol.com': MappingProxyType({
         'server': 'smtp.aol.com',
         'port': 465,
-    },
-    'gmail.com': {
+    }),
+    'gmail.com': MappingProxyType({
         'server': 'smtp.gmail.com',
-    },
+    }),
     'outlook.com': _OUTLOOK_SERVER,
     'hotmail.com': _OUTLOOK_SERVER,
     'live.com': _OUTLOOK_SERVER,
-    'comcast.net': {
+    'comcast.net': MappingProxyType({
         'server': 'smtp.comcast.net',
         'port': 587,
-    },
-}
+    }),
+})
 
 CONFIG_FILE_NAME = 'mailsender_domains.yml'
 CREDS_FILE_NAME = 'mailsender_creds.yml'
 CONFIG_APPLICATION_NAME = 'MailSender'
-DEFAULT_CREDS_FILE = path.join(platformdirs.user_config_dir(CONFIG_APPLICATION_NAME),
-                               CREDS_FILE_NAME)
+# DEFAULT_CREDS_FILE is also available, computed on first use by __getattr__().
 
 
 class MailSenderException(Exception):
@@ -77,13 +111,15 @@ class MailSender:
         # default_file =
         #             path.join(platformdirs.user_config_path(CONFIG_APPLICATION_NAME),
         #                          'mailsender_creds.yml')
-        self.user_cred_file = _get_user_cred_file(**kwargs)
+        # Interned, as these are keys for the module's caches.
+        self.user_cred_file = sys.intern(os.fspath(_get_user_cred_file(**kwargs)))
         creds_dir = path.split(self.user_cred_file)[0]
         # Make sure the credentials directory exists, even with no actual credentials.
-        os.makedirs(creds_dir, mode=0o700, exist_ok=True)
+        if creds_dir not in _DIR_ENSURED:
+            os.makedirs(creds_dir, mode=0o700, exist_ok=True)
+            _DIR_ENSURED.add(creds_dir)
 
-        self.user_cred_lock = f'{self.user_cred_file}.lock'
-        self.cred_locker = FileLock(self.user_cred_lock)
+        self.user_cred_lock = sys.intern(f'{self.user_cred_file}.lock')
         self.user_credentials = self._read_creds_file().get(sender)
         if not self.user_credentials:
             self.user_credentials = {}
@@ -102,27 +138,55 @@ class MailSender:
         Return current content of creds file.
         :return: Content of creds file
         """
-        with self.cred_locker:
-            if path.exists(self.user_cred_file):
-                try:
-                    with open(self.user_cred_file, 'r') as f:
-                        # Question: is there a way to tell safe_load to allow tabs?
-                        creds = yaml.load(f, Loader=yaml.Loader)
-                    return creds
-                except IOError as e:
-                    raise MailSenderException(e, f"Error opening {self.user_cred_file}")
-            else:
-                return {}
+        # Usually the file hasn't changed since it was last parsed, which
+        # can be checked without taking the lock.
+        try:
+            stamp = _file_stamp(self.user_cred_file)
+        except FileNotFoundError:
+            return {}
+        cached = _CREDS_CACHE.get(self.user_cred_file)
+        if cached and cached[0] == stamp:
+            # Callers modify what we return, so don't hand out the cached copy.
+            return copy.deepcopy(cached[1])
+        with _creds_lock(self.user_cred_lock, exclusive=False):
+            return self._load_creds_file()
+
+    def _load_creds_file(self) -> MutableMapping:
+        """
+        Return current content of creds file, parsing it if it changed since
+        it was cached. The caller must hold the credentials lock.
+        :return: Content of creds file
+        """
+        try:
+            with open(self.user_cred_file, 'r', encoding='utf-8') as f:
+                stamp = _file_stamp(f.fileno())
+                cached = _CREDS_CACHE.get(self.user_cred_file)
+                if not cached or cached[0] != stamp:
+                    # Question: is there a way to tell safe_load to allow tabs?
+                    creds = _load_yaml(f)
+                    cached = _CREDS_CACHE[self.user_cred_file] = (stamp, creds)
+        except FileNotFoundError:
+            return {}
+        except IOError as e:
+            raise MailSenderException(e, f"Error opening {self.user_cred_file}")
+        # Callers modify what we return, so don't hand out the cached copy.
+        return copy.deepcopy(cached[1])
 
     def _update_creds(self) -> None:
         """
         Update the user credentials file from the current content of user_creds.
         :return: None
         """
-        with self.cred_locker:
+        with _creds_lock(self.user_cred_lock, exclusive=True):
             # First, reload old credentials
-            current_creds = self._read_creds_file()
+            current_creds = self._load_creds_file()
+            if current_creds.get(self.sender) == self.user_credentials:
+                # Nothing changed, so no need to rewrite the file.
+                return
             current_creds[self.sender] = self.user_credentials
+            # Serialize before touching any files, so the temp file is
+            # written with a single write.
+            payload = _dump_yaml(current_creds)
 
             temp_file = f'{self.user_cred_file}.temp'
             try:
@@ -133,31 +197,52 @@ class MailSender:
                 raise MailSenderException(e, f"Can't write {self.user_cred_file}")
 
             try:
-                os.write(fd, bytes(yaml.safe_dump(current_creds), 'utf-8'))
+                try:
+                    os.write(fd, payload)
+                finally:
+                    os.close(fd)
                 os.replace(temp_file, self.user_cred_file)
+                _CREDS_CACHE.pop(self.user_cred_file, None)
             except Exception as e:
                 raise MailSenderException(e,
                                           "Problem writing new credentials" +
                                           temp_file)
-            finally:
-                os.close(fd)
 
-    @abstractmethod
+    def _serialize(self, message: MIMEBase) -> str:
+        """
+        Return a message as a string, reusing the previous result if the
+        message hasn't changed since, such as when a send is retried.
+        :param message: Message to serialize
+        :return: Serialized message
+        """
+        fingerprint = _message_fingerprint(message)
+        cached = _SERIALIZED_MESSAGES.get(message)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+        msg_str = message.as_string()
+        # Serializing can add headers (e.g. a multipart boundary), so take
+        # the fingerprint again.
+        _SERIALIZED_MESSAGES[message] = (_message_fingerprint(message), msg_str)
+        return msg_str
+
     def send_message(self, message: MIMEBase) -> None:
         """
         Send an email message. (Recipients are encoded in the message.)
+        Extending class must override this.
         :param message: Message to send
         :return: None
         """
+        raise NotImplementedError(f'{type(self).__name__} must implement send_message')
 
-    @abstractmethod
     def get_service_name(self) -> str:
         """Return name of service.
-        Extending class should override this to return
+        Extending class must override this to return
         the appropriate service name.
 
         :return: Name of service
         """
+        raise NotImplementedError(f'{type(self).__name__} must implement '
+                                  'get_service_name')
 
 
 # TODO: Merge smtp_sender into here?
@@ -191,10 +276,15 @@ def create_sender(sender: str,
     #                                             application=CONFIG_APPLICATION_NAME,
     #                                             overrides=overrides)
 
-    (addr, domain) = sender.split('@', 2)
+    addr, _, domain = sender.partition('@')
+    if not domain:
+        raise MailSenderException(f'{sender} is not a valid email address')
     domain_spec = domains_conf.get(domain)
     if not domain_spec:
         raise MailSenderException(f"Domain {domain} isn't recognized")
+    # The configuration is cached and shared, so give the sender its own copy
+    # that it can change.
+    domain_spec = _thaw(domain_spec)
 
     # Primarily for testing, you can provide an explicit "protocol" class specifying
     # the MailSender implementation to instantiate.
@@ -210,19 +300,21 @@ def create_sender(sender: str,
     #     raise MailSenderUnsupportedException(e,
     #                                        "mail_sender_gmail package not installed")
 
-    if protocol == 'smtp':
-        from configured_mail_sender import smtp_sender
-        return smtp_sender.SMTPSender(sender, domain_spec=domain_spec, **kwargs).open()
+    factory = _PROTOCOL_DISPATCH.get(protocol)
+    if factory:
+        return factory(sender, domain_spec, **kwargs).open()
 
-    if ':' not in protocol:
+    # Maybe an explicit module:class?
+    module_, _, class_ = protocol.partition(':')
+    if not class_:
         raise MailSenderException(f'No implementation specified for domain {domain}')
 
-    # Maybe an explicit module:class?
-    (module_, class_) = protocol.split(':', 1)
     try:
-        import importlib
-        mod = importlib.import_module(module_)
-        cls = getattr(mod, class_)
+        cls = _PROTOCOL_CLASS_CACHE.get(protocol)
+        if cls is None:
+            import importlib
+            mod = importlib.import_module(module_)
+            cls = _PROTOCOL_CLASS_CACHE[protocol] = getattr(mod, class_)
         inst = cls(sender, domain_spec=domain_spec, **kwargs)
         if not isinstance(inst, MailSender):
             raise MailSenderException(f'{module_}:{class_} for '
@@ -234,6 +326,54 @@ def create_sender(sender: str,
                                              f'for email domain {domain} unknown)')
 
 
+def _get_smtp():
+    """
+    Return the smtp_sender module. It imports this module, so it can't be
+    imported at the top; this avoids the import statement on every call.
+    :return: smtp_sender module
+    """
+    global _smtp_sender_mod
+    if _smtp_sender_mod is None:
+        from configured_mail_sender import smtp_sender
+        _smtp_sender_mod = smtp_sender
+    return _smtp_sender_mod
+
+
+def _smtp_factory(sender: str, domain_spec: Mapping, **kwargs) -> MailSender:
+    """
+    Create an SMTPSender, for the smtp protocol.
+    :param sender: Sending email address
+    :param domain_spec: Settings for this domain
+    :param kwargs: Other settings for SMTPSender
+    :return: SMTPSender (not yet opened)
+    """
+    return _get_smtp().SMTPSender(sender, domain_spec=domain_spec, **kwargs)
+
+
+# Factories for the built-in protocols. Other protocols must be module:class.
+_PROTOCOL_DISPATCH = {
+    'smtp': _smtp_factory,
+}
+
+
+def _message_fingerprint(message: MIMEBase) -> Tuple:
+    """
+    Return everything as_string() writes for each part of a message: headers,
+    leaf payload, preamble, epilogue and policy. This is much cheaper than
+    serializing it and changes when any part changes.
+    :param message: Message
+    :return: Fingerprint to compare with a later one
+    """
+    # Header values can be (mutable) Header objects, so compare their text
+    # rather than the objects.
+    return tuple(([(k, str(v)) for k, v in part.items()],
+                  None if part.is_multipart() else part.get_payload(),
+                  part.preamble,
+                  part.epilogue,
+                  part.policy)
+                 for part in message.walk())
+
+
 def _get_user_cred_file(creds_file=None,
                         **kwargs) -> str:
     """
@@ -242,10 +382,114 @@ def _get_user_cred_file(creds_file=None,
     :return: Creds file
     """
     if not creds_file:
-        creds_file = environ.get('MAILSENDER_CREDS', DEFAULT_CREDS_FILE)
+        creds_file = environ.get('MAILSENDER_CREDS')
+        if creds_file is None:
+            # Honor DEFAULT_CREDS_FILE if it has been set (or patched).
+            creds_file = globals().get('DEFAULT_CREDS_FILE') or _default_creds_file()
     return creds_file
 
 
+@functools.lru_cache(maxsize=None)
+def _default_creds_file() -> str:
+    """
+    Return path to the credentials file in the user's configuration directory
+    :return: Default creds file
+    """
+    import platformdirs
+    return path.join(platformdirs.user_config_dir(CONFIG_APPLICATION_NAME),
+                     CREDS_FILE_NAME)
+
+
+def __getattr__(name: str) -> Any:
+    # Compute DEFAULT_CREDS_FILE on first reference rather than at import.
+    if name == 'DEFAULT_CREDS_FILE':
+        globals()[name] = _default_creds_file()
+        return globals()[name]
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+@contextlib.contextmanager
+def _creds_lock(lock_file: str, exclusive: bool) -> Iterator[None]:
+    """
+    Hold the credentials lock: shared for readers, so they don't block each
+    other, or exclusive for writers. Where fcntl isn't available (Windows)
+    this is always an exclusive FileLock.
+    :param lock_file: Path to lock file
+    :param exclusive: True to get an exclusive lock
+    """
+    if fcntl is None:
+        with _get_lock(lock_file):
+            yield
+        return
+
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        # Closing the file releases the lock.
+        os.close(fd)
+
+
+def _get_lock(lock_file: str) -> 'FileLock':
+    """
+    Return the (shared) FileLock for a lock file
+    :param lock_file: Path to lock file
+    :return: FileLock
+    """
+    lock = _LOCK_CACHE.get(lock_file)
+    if lock is None:
+        from filelock import FileLock
+        lock = _LOCK_CACHE.setdefault(lock_file, FileLock(lock_file))
+    return lock
+
+
+def _load_yaml(stream) -> Any:
+    """
+    Parse YAML with the LibYAML safe loader if available, as it's much
+    faster than the pure Python one.
+    :param stream: Stream to read
+    :return: Parsed content
+    """
+    import yaml
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeLoader as Loader
+    return yaml.load(stream, Loader=Loader)
+
+
+def _dump_yaml(data: Any) -> bytes:
+    """
+    Serialize data to UTF-8 YAML with the LibYAML safe dumper if available.
+    :param data: Data to serialize
+    :return: Encoded YAML
+    """
+    import yaml
+    try:
+        from yaml import CSafeDumper as Dumper
+    except ImportError:
+        from yaml import SafeDumper as Dumper
+    # Have the dumper encode as it goes, rather than building a str and
+    # copying it to bytes. Keys are sorted so the same data always produces
+    # the same file.
+    return yaml.dump(data, Dumper=Dumper, encoding='utf-8',
+                     sort_keys=True, default_flow_style=False)
+
+
+def _file_stamp(file: Union[str, int]) -> Tuple[int, int, int, int]:
+    """
+    Return identity, modification time and size of a file, to tell if it has
+    changed. Files are rewritten with os.replace(), which gives them a new
+    inode, so a rewrite is noticed even within one timestamp tick.
+    :param file: Path to file, or an open file descriptor
+    :return: (dev, ino, mtime_ns, size)
+    :raises: FileNotFoundError if the file doesn't exist
+    """
+    st = os.stat(file)
+    return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+
 def config_file_list(base_config: str = None,
                      overrides: str = None,
                      creds_file: str = None) -> List[str]:
@@ -256,6 +500,7 @@ def config_file_list(base_config: str = None,
     :param creds_file: Explicit path to user credentials file
     :return: List of directories searched
     """
+    import combine_settings
     file_list = combine_settings.config_file_list(
         CONFIG_FILE_NAME,
         base_config=base_config,
@@ -270,13 +515,89 @@ def _get_domain_conf(base_config: Union[str, Dict] = None,
                      overrides: Union[str, Dict] = None) -> Mapping[str, Dict]:
 
     base_config = base_config if base_config else _BUILTIN_DOMAINS
+    if ((base_config is not _BUILTIN_DOMAINS and isinstance(base_config, Mapping))
+            or isinstance(overrides, Mapping)):
+        # A caller's dict could change between calls, so don't cache.
+        return _load_domain_conf(base_config, overrides)
+
+    # Cache on the state of every file load_config() would read, so editing
+    # any of them is noticed.
+    import combine_settings
+    files = combine_settings.config_file_list(CONFIG_FILE_NAME,
+                                              base_config=base_config,
+                                              application=CONFIG_APPLICATION_NAME,
+                                              overrides=overrides)
+    stamps = tuple(_file_stamp_or_none(f) for f in files)
+    if base_config is _BUILTIN_DOMAINS and not any(stamps):
+        # No configuration files at all (the usual case), so the built-in
+        # domains are the whole configuration.
+        return _BUILTIN_DOMAINS
+    return _load_domain_conf_cached(
+        None if base_config is _BUILTIN_DOMAINS else base_config,
+        overrides,
+        stamps)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_domain_conf_cached(base_config: Optional[str],
+                             overrides: Optional[str],
+                             stamps: Tuple) -> Mapping[str, Mapping]:
+    """
+    Cached load_config() for file-based configurations.
+    :param base_config: Base configuration file, or None for the built-in domains
+    :param overrides: Override file, if any
+    :param stamps: _file_stamp_or_none() of each configuration file, for the cache key
+    :return: Read-only domain configurations
+    """
+    return _freeze(_load_domain_conf(base_config if base_config else _BUILTIN_DOMAINS,
+                                     overrides))
+
+
+def _load_domain_conf(base_config: Union[str, Mapping],
+                      overrides: Union[str, Mapping, None]) -> Mapping[str, Dict]:
     # Load global configurations (service type, SMTP url and port, etc)
+    # load_config() deep copies a base mapping, which doesn't work on a
+    # MappingProxyType.
+    if isinstance(base_config, Mapping):
+        base_config = _thaw(base_config)
+    import combine_settings
     return combine_settings.load_config(CONFIG_FILE_NAME,
                                         base_config=base_config,
                                         application=CONFIG_APPLICATION_NAME,
                                         overrides=overrides)
 
 
+def _file_stamp_or_none(file: str) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Like _file_stamp(), but None if the file can't be examined.
+    :param file: Path to file
+    :return: (dev, ino, mtime_ns, size) or None
+    """
+    try:
+        return _file_stamp(file)
+    except OSError:
+        return None
+
+
+def _freeze(m: Mapping) -> Mapping:
+    """
+    Return a read-only copy of a mapping, including nested mappings.
+    :param m: Mapping to copy
+    :return: Read-only copy
+    """
+    return MappingProxyType({k: _freeze(v) if isinstance(v, Mapping) else v
+                             for k, v in m.items()})
+
+
+def _thaw(m: Mapping) -> Dict:
+    """
+    Return a plain dict copy of a mapping, including nested mappings.
+    :param m: Mapping to copy
+    :return: dict copy
+    """
+    return {k: _thaw(v) if isinstance(v, Mapping) else v for k, v in m.items()}
+
+
 def known_domains(base_config: str = None,
                   overrides: str = None) -> Dict[str, str]:
     """
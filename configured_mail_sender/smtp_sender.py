@@ -179,8 +179,11 @@ class SMTPSender(MailSender):
         r_list = [message.get(r) for r in ['To', 'Cc', 'Bcc']]
         r_list = [r for r in r_list if r]
         receivers = ','.join(r_list)
-        message['From'] = self.sender
-        self._send_message(self.sender, receivers, message.as_string())
+        # Assigning a header adds another, so drop any existing From first.
+        if message.get('From') != self.sender:
+            del message['From']
+            message['From'] = self.sender
+        self._send_message(self.sender, receivers, self._serialize(message))
 
     def _send_message(self, sender: str, receivers: str, msg_str: str) -> None:
         """
@@ -1,6 +1,9 @@
+import os
+import tempfile
 from os import path
 # from unittest import TestCase
 import unittest
+from unittest import mock
 from email.mime.base import MIMEBase
 import platformdirs
 
@@ -32,6 +35,13 @@ class TestBase(MailSender):
         self.message = message
 
 
+class MutatingBase(TestBase):
+    """Sender that changes its domain settings"""
+    def __init__(self, sender, **kwargs):
+        TestBase.__init__(self, sender, **kwargs)
+        self.domain_spec['senders'] = self.domain_spec.get('senders', 0) + 1
+
+
 class Test(TestCase):
     def test_creation(self):
         """Instantiate basic class and verify some generic settings"""
@@ -40,6 +50,13 @@ class Test(TestCase):
         self.assertEqual(mailer.sender, SENDER)
         self.assertEqual(SERVICE_NAME, mailer.get_service_name())
 
+    def test_mutable_domain_spec(self):
+        """Each sender gets its own copy of the domain settings"""
+        first = create_sender('foo@mutating.test', overrides=CONF_FILE)
+        second = create_sender('foo@mutating.test', overrides=CONF_FILE)
+        self.assertEqual(1, first.domain_spec['senders'])
+        self.assertEqual(1, second.domain_spec['senders'])
+
     def test_no_gmail(self):
         """Make sure attempt to use gmail protocol fails as expected"""
         self.assertRaises(MailSenderException,
@@ -55,6 +72,10 @@ class Test(TestCase):
         self.assertRaises(MailSenderException,
                           lambda: create_sender("foo@nosuchdomain"))
 
+    def test_bad_address(self):
+        self.assertRaises(MailSenderException,
+                          lambda: create_sender("foo.base.com"))
+
     def test_no_sender(self):
         self.assertRaises(MailSenderException,
                           lambda: create_sender(None))
@@ -64,6 +85,61 @@ class Test(TestCase):
         self.assertEqual('smtp.mail.yahoo.com', domains.get('yahoo.com'))
         self.assertEqual(7, len(domains))
 
+    def test_builtin_domains_read_only(self):
+        """Built-in domains can't be changed by accident"""
+        builtins = configured_mail_sender.mail_sender._BUILTIN_DOMAINS
+        with self.assertRaises(TypeError):
+            builtins['gmail.com']['server'] = 'smtp.example.test'
+        with self.assertRaises(TypeError):
+            builtins['example.test'] = {}
+
+    def test_override_file_changed(self):
+        """Changes to an override file are seen by the next load"""
+        with tempfile.TemporaryDirectory() as tmp:
+            overrides = path.join(tmp, 'overrides.yml')
+            with open(overrides, 'w') as f:
+                f.write('yahoo.com:\n  server: first.test\n')
+            domains = configured_mail_sender.known_domains(overrides=overrides)
+            self.assertEqual('first.test', domains.get('yahoo.com'))
+
+            with open(overrides, 'w') as f:
+                f.write('yahoo.com:\n  server: second.server.test\n')
+            domains = configured_mail_sender.known_domains(overrides=overrides)
+            self.assertEqual('second.server.test', domains.get('yahoo.com'))
+
+            os.remove(overrides)
+            domains = configured_mail_sender.known_domains(overrides=overrides)
+            self.assertEqual('smtp.mail.yahoo.com', domains.get('yahoo.com'))
+
+    @unittest.skipIf(configured_mail_sender.mail_sender.fcntl is None,
+                     'shared locks need fcntl')
+    def test_shared_creds_lock(self):
+        """Readers of the credentials file don't block each other"""
+        creds_lock = configured_mail_sender.mail_sender._creds_lock
+        with tempfile.TemporaryDirectory() as tmp:
+            lock_file = path.join(tmp, 'creds.yml.lock')
+            with creds_lock(lock_file, exclusive=False):
+                with creds_lock(lock_file, exclusive=False):
+                    pass
+            with creds_lock(lock_file, exclusive=True):
+                pass
+
+    def test_creds_dump_stable(self):
+        """Credentials are written in block style with sorted keys"""
+        dump_yaml = configured_mail_sender.mail_sender._dump_yaml
+        self.assertEqual(b'a@x.test:\n  password: p\n  userid: u\nb@x.test: {}\n',
+                         dump_yaml({'b@x.test': {},
+                                    'a@x.test': {'userid': 'u', 'password': 'p'}}))
+
+    def test_default_creds_file_override(self):
+        """Setting DEFAULT_CREDS_FILE changes the default credentials file"""
+        creds_file = path.join(TEST_CONFIG_DIR, 'default_creds.yml')
+        with mock.patch.dict(os.environ), \
+                mock.patch.object(configured_mail_sender.mail_sender,
+                                  'DEFAULT_CREDS_FILE', creds_file):
+            os.environ.pop('MAILSENDER_CREDS', None)
+            self.assertEqual(creds_file, configured_mail_sender.config_file_list()[-1])
+
     def test_file_list(self):
         config_files = configured_mail_sender.config_file_list()
         self.assertEqual(path.join(platformdirs.user_config_path('MailSender'),
@@ -1,5 +1,6 @@
 import unittest
 import os
+import pathlib
 import yaml
 from configured_mail_sender.mail_sender import create_sender, MailSenderException
 from configured_mail_sender.smtp_sender import (SMTPSender,
@@ -9,6 +10,7 @@ from unittest import TestCase
 from smtplib import SMTP_SSL
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.header import Header
 
 CONF_BASE = os.path.join(os.path.split(__file__)[0], 'test_configs')
 SERVICE_NAME = "smtp_test"
@@ -116,6 +118,37 @@ class TestBasic(TestCase):
                 receivers.remove(r)
         self.assertTrue(len(receivers) == 0, f'Extra receivers in {receivers}')
 
+    def test_resend_changed(self) -> None:
+        """Sending a message again after changing it sends the new content."""
+        msg = MIMEMultipart()
+        msg['Subject'] = 'This is a test'
+        msg['To'] = "test_to@example.com"
+        body = MIMEText("First report.", 'plain')
+        msg.attach(body)
+        self.sender.send_message(msg)
+        first = self.sender.smtp.message
+        self.sender.send_message(msg)
+        self.assertIs(first, self.sender.smtp.message)
+        self.assertEqual(['From'], [h for h in msg.keys() if h == 'From'])
+
+        body.set_payload("Second report.")
+        self.sender.send_message(msg)
+        self.assertIn("Second report.", self.sender.smtp.message)
+        self.assertEqual(self.sender.smtp.message, msg.as_string())
+
+        subject = Header('First subject')
+        msg['Keywords'] = subject
+        self.sender.send_message(msg)
+        subject.append('and more')
+        self.sender.send_message(msg)
+        self.assertIn('and more', self.sender.smtp.message)
+        self.assertEqual(self.sender.smtp.message, msg.as_string())
+
+        msg.preamble = 'This is a MIME message'
+        self.sender.send_message(msg)
+        self.assertIn('This is a MIME message', self.sender.smtp.message)
+        self.assertEqual(self.sender.smtp.message, msg.as_string())
+
 
 class TestNewPassword(TestCase):
 
@@ -159,6 +192,14 @@ class TestNewPassword(TestCase):
                                creds_file=self.test_cred_file)
         self.assertEqual(sender.password, PREVIOUS_PASSWORD)
 
+    def test_creds_file_path(self):
+        """ creds_file can be a Path as well as a str """
+        sender = create_sender(PREVIOUS_SENDER,
+                               overrides=DOMAIN_FILE,
+                               creds_file=pathlib.Path(self.test_cred_file))
+        self.assertEqual(sender.password, PREVIOUS_PASSWORD)
+        self.assertEqual(sender.user_cred_file, self.test_cred_file)
+
     def test_explicit_password(self):
         """ Verify that explicit password overrides configuration file """
         test_pwd = "plover"
@@ -168,6 +209,47 @@ class TestNewPassword(TestCase):
                                creds_file=self.test_cred_file)
         self.assertEqual(sender.password, test_pwd)
 
+    def test_cached_creds_not_shared(self):
+        """ Changes to one sender's credentials don't leak into the next sender """
+        sender = create_sender(PREVIOUS_SENDER,
+                               overrides=DOMAIN_FILE,
+                               creds_file=self.test_cred_file)
+        sender.user_credentials['password'] = 'plover'
+        sender = create_sender(PREVIOUS_SENDER,
+                               overrides=DOMAIN_FILE,
+                               creds_file=self.test_cred_file)
+        self.assertEqual(sender.password, PREVIOUS_PASSWORD)
+
+    def test_replaced_creds_reread(self):
+        """ A replaced creds file is noticed even with the same mtime and size """
+        with open(self.user_password_file, 'w') as f:
+            f.write(f'{self.other_sender}:\n  password: first\n')
+        sender = create_sender(self.other_sender,
+                               overrides=DOMAIN_FILE,
+                               creds_file=self.user_password_file)
+        self.assertEqual('first', sender.password)
+
+        st = os.stat(self.user_password_file)
+        new_file = f'{self.user_password_file}.new'
+        with open(new_file, 'w') as f:
+            f.write(f'{self.other_sender}:\n  password: other\n')
+        os.utime(new_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(new_file, self.user_password_file)
+
+        sender = create_sender(self.other_sender,
+                               overrides=DOMAIN_FILE,
+                               creds_file=self.user_password_file)
+        self.assertEqual('other', sender.password)
+
+    def test_unchanged_creds_not_written(self):
+        """ Updating credentials that didn't change leaves the file alone """
+        sender = create_sender(PREVIOUS_SENDER,
+                               overrides=DOMAIN_FILE,
+                               creds_file=self.test_cred_file)
+        before = os.stat(self.test_cred_file).st_mtime_ns
+        sender._update_creds()
+        self.assertEqual(before, os.stat(self.test_cred_file).st_mtime_ns)
+
 
 class TestPortSecurity(TestCase):
     """